@@ -1,6 +1,10 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
+import plotly.graph_objects as go
+
+from scripts.build_cache import CACHE_FILES, build_cache, cache_is_stale
+
 # ========================
 # App Config
 # ========================
@@ -11,44 +15,84 @@ st.set_page_config(
 
 
 # ========================
-# Tab separation
+# Load Data
 # ========================
-tab1, tab2, tab3 = st.tabs(["📊 Rankings", "🏆 Playoff Simulator", "Algorithm & Scoring"])
+# Cached once per process and shared by every session, so treat the frames as read-only
+@st.cache_resource
+def load_data():
+    if cache_is_stale():
+        build_cache()
+
+    master = pd.read_parquet(CACHE_FILES["master"])
+    # Keep ranks ordered by Year so a season cutoff is a binary search over rank_years
+    ranks = pd.read_parquet(CACHE_FILES["ranks"]).sort_values("Year", kind="stable", ignore_index=True)
+    rank_years = ranks["Year"].to_numpy()
+    winrank = pd.read_parquet(CACHE_FILES["winrank"])
+    winpct = pd.read_parquet(CACHE_FILES["winpct"])
+
+    # Each team's most recent rank through every season, so the year slider is a lookup
+    latest_rank_by_year = {
+        int(year): (
+            ranks.iloc[:np.searchsorted(rank_years, year, side="right")]
+                .groupby("Team", as_index=False, observed=True)
+                .last()[["Team", "Rank"]]
+        )
+        for year in ranks["Year"].unique()
+    }
 
-with tab1:
-    
-    # ========================
-    # Load Data
-    # ========================
-    @st.cache_data
-    def load_data():
-        xls = pd.ExcelFile("data/nfl_data.xlsm")
-
-        master = pd.read_excel(xls, "Master Sheet")
-        ranks_raw = pd.read_excel(xls, "Rank by Year")
-        winrank_raw = pd.read_excel(xls, "Winning % Rank Over Time")
-        winpct_raw = pd.read_excel(xls, "Winning % Over Time")
-
-        def melt_year_team(df, value_name):
-            year_col = df.columns[0]
-            return (
-                df.melt(
-                    id_vars=[year_col],
-                    var_name="Team",
-                    value_name=value_name
-                )
-                .rename(columns={year_col: "Year"})
-                .dropna(subset=[value_name])
-            )
+    # Year x Team matrix, so "rank in year Y" is a single row slice
+    ranks_wide = ranks.pivot(index="Year", columns="Team", values="Rank").astype("Int16")
+
+    # All-season achievement totals per team for the Snapshot Comparison
+    stat_cols = ["SB Win", "SB App", "CC app", "Division Title?", "Playoff Appearance?", "MVP"]
+    master_agg = (
+        master.groupby("Team", as_index=False, observed=True)
+        .agg({"Division": "first", **{col: "sum" for col in stat_cols}})
+        .astype({col: "int32" for col in stat_cols})
+    )
 
-        ranks = melt_year_team(ranks_raw, "Rank")
-        winrank = melt_year_team(winrank_raw, "Winning % Rank")
-        winpct = melt_year_team(winpct_raw, "Winning %")
+    # Latest season's teams, the starting point for the Playoff Simulator
+    latest_year = int(master["Year"].max())
+    teams_latest = (
+        master[master["Year"] == latest_year]
+        [["Team", "Division", "Total Team Points"]]
+        .drop_duplicates(subset="Team")
+        .assign(Conference=lambda d: d["Division"].str[:3])
+    )
+
+    return (
+        master, ranks, rank_years, winrank, winpct,
+        latest_rank_by_year, ranks_wide, master_agg, teams_latest
+    )
 
-        return master, ranks, winrank, winpct
 
+# master comes from load_data() and never changes within a process, so the leading
+# underscore keeps Streamlit from hashing the whole frame on every call
+@st.cache_data
+def get_divisions(_master):
+    return sorted(_master["Division"].dropna().unique())
 
-    master, ranks, winrank, winpct = load_data()
+
+@st.cache_data
+def get_team_options(_master, divisions):
+    if divisions:
+        teams = _master[_master["Division"].isin(divisions)]["Team"]
+    else:
+        teams = _master["Team"]
+    return list(teams.sort_values().unique())
+
+
+(
+    master, ranks, rank_years, winrank, winpct,
+    latest_rank_by_year, ranks_wide, master_agg, teams_latest
+) = load_data()
+
+
+# ========================
+# TAB 1 — Rankings
+# ========================
+@st.fragment
+def rankings_tab():
 
     # ========================
     # Header
@@ -73,22 +117,14 @@ with tab1:
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        divisions = sorted(master["Division"].dropna().unique())
+        divisions = get_divisions(master)
         selected_divisions = st.multiselect(
             "Division",
             options=divisions
         )
 
     with col2:
-        if selected_divisions:
-            team_options = (
-                master[master["Division"].isin(selected_divisions)]
-                ["Team"]
-                .sort_values()
-                .unique()
-            )
-        else:
-            team_options = master["Team"].sort_values().unique()
+        team_options = get_team_options(master, tuple(selected_divisions))
 
         selected_teams = st.multiselect(
             "Team",
@@ -96,26 +132,22 @@ with tab1:
         )
 
     with col3:
+        # rank_years is sorted, so the last entry is the most recent ranked season
         selected_year = st.slider(
             "Through Year",
             min_value=1966,
-            max_value=int(ranks["Year"].max()),
-            value=int(ranks["Year"].max())
+            max_value=int(rank_years[-1]),
+            value=int(rank_years[-1])
         )
 
     # ========================
     # Filtered Rank Data
     # ========================
-    filtered_ranks = ranks[
-        (ranks["Year"] <= selected_year) &
-        (ranks["Team"].isin(selected_teams if selected_teams else team_options))
+    filtered_ranks = ranks.iloc[:np.searchsorted(rank_years, selected_year, side="right")]
+    filtered_ranks = filtered_ranks[
+        filtered_ranks["Team"].isin(selected_teams if selected_teams else team_options)
     ]
 
-    if selected_teams:
-        filtered_ranks = filtered_ranks[
-            filtered_ranks["Team"].isin(selected_teams)
-        ]
-
     col_rank, col_snapshot = st.columns([1, 2])
 
     # ========================
@@ -127,12 +159,10 @@ with tab1:
             "Franchise rank and cumulative points through the selected year."
         )
 
-        latest_rank = (
-            filtered_ranks
-                .sort_values("Year")
-                .groupby("Team", as_index=False)
-                .last()[["Team", "Rank"]]
-        )
+        latest_rank = latest_rank_by_year[selected_year]
+        latest_rank = latest_rank[
+            latest_rank["Team"].isin(selected_teams if selected_teams else team_options)
+        ]
 
         master_year = master[master["Year"] == selected_year]
         team_points = master_year[["Team", "Total Team Points"]]
@@ -163,32 +193,15 @@ with tab1:
             "Cumulative franchise achievements compared side-by-side for the selected teams."
         )
 
-        comparison = master[master["Team"].isin(team_options)].copy()
-        if selected_teams:
-            comparison = comparison[comparison["Team"].isin(selected_teams)]
-
-        if not comparison.empty:
-            comparison_summary = (
-                comparison.groupby("Team")
-                .agg({
-                    "Division": "first",
-                    "SB Win": "sum",
-                    "SB App": "sum",
-                    "CC app": "sum",
-                    "Division Title?": "sum",
-                    "Playoff Appearance?": "sum",
-                    "MVP": "sum"
-                })
-                .reset_index()
-            )
+        comparison_summary = master_agg[
+            master_agg["Team"].isin(selected_teams if selected_teams else team_options)
+        ]
 
-            year_ranks = ranks[ranks["Year"] == selected_year][["Team", "Rank"]]
+        if not comparison_summary.empty:
+            year_ranks = ranks_wide.loc[selected_year].rename("Rank").reset_index()
             comparison_summary = comparison_summary.merge(year_ranks, on="Team", how="left")
 
-            numeric_cols = ["SB Win", "SB App", "CC app", "Division Title?", "Playoff Appearance?","MVP", "Rank"]
-            for col in numeric_cols:
-                if col in comparison_summary.columns:
-                    comparison_summary[col] = comparison_summary[col].fillna(0).astype(int)
+            comparison_summary["Rank"] = comparison_summary["Rank"].fillna(0).astype(int)
 
             comparison_summary = comparison_summary.rename(columns={
                 "Rank": f"Rank in {selected_year}",
@@ -213,7 +226,13 @@ with tab1:
                 "MVPs"
             ]
 
-            comparison_transposed = comparison_summary.set_index("Team")[ordered_stats].T
+            # Plain string team names, so the transposed column index isn't a CategoricalIndex
+            comparison_transposed = (
+                comparison_summary
+                    .assign(Team=comparison_summary["Team"].astype(str))
+                    .set_index("Team")[ordered_stats]
+                    .T
+            )
 
             st.dataframe(
                 comparison_transposed,
@@ -228,14 +247,29 @@ with tab1:
         "Tracks how each franchise's ranking has evolved over time. Lower values indicate better performance."
     )
 
-    fig_rank = px.line(
-        filtered_ranks,
-        x="Year",
-        y="Rank",
-        color="Team",
-        markers=True
+    # One WebGL trace per team column; connectgaps bridges seasons a franchise sat out.
+    # filtered_ranks is in Year order, so sort the columns to keep the legend alphabetical.
+    ranks_by_team = (
+        filtered_ranks
+            .pivot(index="Year", columns="Team", values="Rank")
+            .dropna(axis=1, how="all")
+            .sort_index(axis=1)
     )
 
+    fig_rank = go.Figure([
+        go.Scattergl(
+            x=ranks_by_team.index,
+            y=ranks_by_team[team],
+            name=team,
+            mode="lines+markers",
+            connectgaps=True,
+            hovertemplate="Team=" + team + "<br>Year=%{x}<br>Rank=%{y}<extra></extra>"
+        )
+        for team in ranks_by_team.columns
+    ])
+
+    fig_rank.update_layout(legend_title_text="Team")
+    fig_rank.update_xaxes(title="Year")
     fig_rank.update_yaxes(
         autorange="reversed",
         title="Rank (1 = Best)"
@@ -257,13 +291,13 @@ with tab1:
 
         division_points = (
             master
-                .groupby(["Division", "Team"], as_index=False)
+                .groupby(["Division", "Team"], as_index=False, observed=True)
                 .agg(Team_Points=("Total Team Points", "max"))
         )
 
         division_summary = (
             division_points
-                .groupby("Division", as_index=False)
+                .groupby("Division", as_index=False, observed=True)
                 .agg(Division_Points=("Team_Points", "sum"))
                 .sort_values("Division_Points", ascending=False)
                 .reset_index(drop=True)
@@ -285,49 +319,43 @@ with tab1:
             hide_index=True
         )
 
-    division_summary["Division_Points"] = (
-        division_summary["Division_Points"].astype(int)
-    )
-
 # ========================
 # TAB 2 — Playoff Simulator
 # ========================
-with tab2:
+@st.fragment
+def sim_tab():
+
+    # Keys of the playoff widgets, so a reset only touches what the simulator created
+    sim_keys = st.session_state.setdefault("_sim_keys", set())
+
+    def sim_key(key):
+        sim_keys.add(key)
+        return key
 
     if st.button("🔄 Reset Simulation"):
-        for key in list(st.session_state.keys()):
-            if (
-                key.startswith("AFC_")
-                or key.startswith("NFC_")
-                or key.startswith("sb_")
-            ):
-                del st.session_state[key]
+        for key in sim_keys:
+            st.session_state.pop(key, None)
+        sim_keys.clear()
         st.rerun()
 
     st.header("🏆 Playoff Simulation")
 
-    latest_year = master["Year"].max()
-
-    teams_latest = (
-        master[master["Year"] == latest_year]
-        [["Team", "Division", "Total Team Points"]]
-        .drop_duplicates(subset="Team")
-    )
-
-    teams_latest["Conference"] = teams_latest["Division"].str[:3]
-
     st.caption(
         "Simulate playoff outcomes by selecting division winners and wild card teams. "
         "Bonus points are applied temporarily and rankings update in real time."
     )
 
     base_scores = (
-        master[master["Year"] == latest_year]
-        [["Team", "Total Team Points"]]
+        teams_latest[["Team", "Total Team Points"]]
         .rename(columns={"Total Team Points": "Base Points"})
-        .drop_duplicates(subset="Team")
     )
 
+    def teams_by_conference(teams_df):
+        return {
+            conference: group["Team"].sort_values().tolist()
+            for conference, group in teams_df.groupby("Conference")
+        }
+
     # ========================
     # Division Winners
     # ========================
@@ -363,8 +391,8 @@ with tab2:
         # ========================
         st.subheader("Wild Card Teams")
 
-        remaining = teams_latest[~teams_latest["Team"].isin(division_winners)].copy()
-        remaining["Conference"] = remaining["Division"].str[:3]
+        remaining = teams_latest[~teams_latest["Team"].isin(division_winners)]
+        remaining_by_conf = teams_by_conference(remaining)
 
         wildcard_teams = []
         wc_complete = True
@@ -372,19 +400,15 @@ with tab2:
         for conference in ["AFC", "NFC"]:
             st.markdown(f"### {conference} Wild Cards")
 
-            conf_teams = remaining[remaining["Conference"] == conference].sort_values("Team")
-            team_list = conf_teams["Team"].tolist()
-
-            TEAMS_PER_ROW = 3
-            wc_rows = [team_list[i:i + TEAMS_PER_ROW] for i in range(0, len(team_list), TEAMS_PER_ROW)]
+            team_list = remaining_by_conf.get(conference, [])
 
-            selected_conf = []
-            for wc_row in wc_rows:
-                cols = st.columns(len(wc_row))
-                for col, team in zip(cols, wc_row):
-                    checked = col.checkbox(team, key=f"{conference}_wc_{team}")
-                    if checked:
-                        selected_conf.append(team)
+            selected_conf = st.multiselect(
+                f"{conference} Wild Card teams",
+                options=team_list,
+                max_selections=3,
+                key=sim_key(f"{conference}_wc"),
+                label_visibility="collapsed"
+            )
 
             if len(selected_conf) != 3:
                 st.warning(f"Select exactly 3 {conference} Wild Card teams.")
@@ -400,10 +424,18 @@ with tab2:
             selected_playoff_teams = division_winners + wildcard_teams
 
             simulation = base_scores.copy()
-            simulation["Bonus Points"] = 0
 
-            simulation.loc[simulation["Team"].isin(division_winners), "Bonus Points"] += 2
-            simulation.loc[simulation["Team"].isin(wildcard_teams), "Bonus Points"] += 1
+            # Integer category codes for each team, used to write the bonus vector in one pass
+            team_codes = simulation["Team"].astype("category").cat
+            team_to_code = {team: code for code, team in enumerate(team_codes.categories)}
+            code_array = team_codes.codes.to_numpy()
+
+            # Bonuses accumulate per team as each round is decided
+            bonus_map = {team: 2 for team in division_winners} | {team: 1 for team in wildcard_teams}
+
+            def add_bonus(teams, points):
+                for team in teams:
+                    bonus_map[team] = bonus_map.get(team, 0) + points
 
             # ========================
             # Wild Card Round Winners
@@ -411,8 +443,8 @@ with tab2:
             st.subheader("Playoff Results")
             st.subheader("Wild Card Round Winners")
 
-            playoff_teams_df = teams_latest[teams_latest["Team"].isin(selected_playoff_teams)].copy()
-            playoff_teams_df["Conference"] = playoff_teams_df["Division"].str[:3]
+            playoff_teams_df = teams_latest[teams_latest["Team"].isin(selected_playoff_teams)]
+            playoff_teams_by_conf = teams_by_conference(playoff_teams_df)
 
             wc_winners = []
             wc_round_complete = True
@@ -420,19 +452,15 @@ with tab2:
             for conference in ["AFC", "NFC"]:
                 st.markdown(f"### {conference} Wild Card Round Winners")
 
-                conf_teams = playoff_teams_df[playoff_teams_df["Conference"] == conference].sort_values("Team")
-                team_list = conf_teams["Team"].tolist()
+                team_list = playoff_teams_by_conf.get(conference, [])
 
-                TEAMS_PER_ROW = 4
-                wc_win_rows = [team_list[i:i + TEAMS_PER_ROW] for i in range(0, len(team_list), TEAMS_PER_ROW)]
-
-                selected_conf = []
-                for wc_win_row in wc_win_rows:
-                    cols = st.columns(len(wc_win_row))
-                    for col, team in zip(cols, wc_win_row):
-                        checked = col.checkbox(team, key=f"{conference}_wc_win_{team}")
-                        if checked:
-                            selected_conf.append(team)
+                selected_conf = st.multiselect(
+                    f"{conference} Wild Card winners",
+                    options=team_list,
+                    max_selections=4,
+                    key=sim_key(f"{conference}_wc_win"),
+                    label_visibility="collapsed"
+                )
 
                 if len(selected_conf) != 4:
                     st.warning(f"Select exactly 4 {conference} Wild Card winners.")
@@ -444,15 +472,15 @@ with tab2:
                 pass  # warnings already shown above
 
             else:
-                simulation.loc[simulation["Team"].isin(wc_winners), "Bonus Points"] += 2
+                add_bonus(wc_winners, 2)
 
                 # ========================
                 # Divisional Round Winners
                 # ========================
                 st.subheader("Divisional Round Winners - Conference Championship Matchups")
 
-                wc_winners_df = teams_latest[teams_latest["Team"].isin(wc_winners)].copy()
-                wc_winners_df["Conference"] = wc_winners_df["Division"].str[:3]
+                wc_winners_df = teams_latest[teams_latest["Team"].isin(wc_winners)]
+                wc_winners_by_conf = teams_by_conference(wc_winners_df)
 
                 div_winners = []
                 div_round_complete = True
@@ -460,19 +488,15 @@ with tab2:
                 for conference in ["AFC", "NFC"]:
                     st.markdown(f"### {conference} Divisional Round Winners")
 
-                    conf_teams = wc_winners_df[wc_winners_df["Conference"] == conference].sort_values("Team")
-                    team_list = conf_teams["Team"].tolist()
+                    team_list = wc_winners_by_conf.get(conference, [])
 
-                    TEAMS_PER_ROW = 2
-                    div_rows = [team_list[i:i + TEAMS_PER_ROW] for i in range(0, len(team_list), TEAMS_PER_ROW)]
-
-                    selected_conf = []
-                    for div_row in div_rows:
-                        cols = st.columns(len(div_row))
-                        for col, team in zip(cols, div_row):
-                            checked = col.checkbox(team, key=f"{conference}_div_win_{team}")
-                            if checked:
-                                selected_conf.append(team)
+                    selected_conf = st.multiselect(
+                        f"{conference} Divisional Round winners",
+                        options=team_list,
+                        max_selections=2,
+                        key=sim_key(f"{conference}_div_win"),
+                        label_visibility="collapsed"
+                    )
 
                     if len(selected_conf) != 2:
                         st.warning(f"Select exactly 2 {conference} Divisional Round winners.")
@@ -484,7 +508,7 @@ with tab2:
                     pass  # warnings already shown above
 
                 else:
-                    simulation.loc[simulation["Team"].isin(div_winners), "Bonus Points"] += 4
+                    add_bonus(div_winners, 4)
 
                     # ========================
                     # Conference Champions
@@ -492,23 +516,23 @@ with tab2:
                     st.subheader("Conference Champions – Super Bowl Matchups")
 
                     conf_champions = []
-                    div_winners_df = teams_latest[teams_latest["Team"].isin(div_winners)].copy()
-                    div_winners_df["Conference"] = div_winners_df["Division"].str[:3]
+                    div_winners_df = teams_latest[teams_latest["Team"].isin(div_winners)]
+                    div_winners_by_conf = teams_by_conference(div_winners_df)
 
                     conf_complete = True
 
                     for conference in ["AFC", "NFC"]:
                         st.markdown(f"### {conference} Conference Champion")
 
-                        conf_teams = div_winners_df[div_winners_df["Conference"] == conference].sort_values("Team")
-                        team_list = conf_teams["Team"].tolist()
+                        team_list = div_winners_by_conf.get(conference, [])
 
-                        selected_conf = []
-                        cols = st.columns(len(team_list))
-                        for col, team in zip(cols, team_list):
-                            checked = col.checkbox(team, key=f"{conference}_conf_champ_{team}")
-                            if checked:
-                                selected_conf.append(team)
+                        selected_conf = st.multiselect(
+                            f"{conference} Conference Champion",
+                            options=team_list,
+                            max_selections=1,
+                            key=sim_key(f"{conference}_conf_champ"),
+                            label_visibility="collapsed"
+                        )
 
                         if len(selected_conf) != 1:
                             st.warning(f"Select exactly 1 {conference} Conference Champion.")
@@ -520,7 +544,7 @@ with tab2:
                         pass  # warnings already shown above
 
                     else:
-                        simulation.loc[simulation["Team"].isin(conf_champions), "Bonus Points"] += 11
+                        add_bonus(conf_champions, 11)
 
                         # ========================
                         # Super Bowl Champion
@@ -530,50 +554,41 @@ with tab2:
                         sb_winner = st.radio(
                             "Select the Super Bowl Champion",
                             options=conf_champions,
-                            horizontal=True
+                            horizontal=True,
+                            key=sim_key("sb_winner")
                         )
 
-                        simulation.loc[simulation["Team"] == sb_winner, "Bonus Points"] += 29
+                        add_bonus([sb_winner], 29)
+
+                        bonus_by_code = np.zeros(len(team_to_code), dtype="int32")
+                        bonus_by_code[[team_to_code[team] for team in bonus_map]] = list(bonus_map.values())
+                        simulation["Bonus Points"] = bonus_by_code[code_array]
 
                         # ========================
                         # Final Results Table
                         # ========================
-                        results = (
-                            master[master["Year"] == latest_year]
-                            [["Team", "Total Team Points"]]
-                            .rename(columns={"Total Team Points": "Base Points"})
-                        )
-
-                        results = results.merge(
-                            simulation[["Team", "Bonus Points"]],
-                            on="Team",
-                            how="left"
-                        )
-
-                        results["Bonus Points"] = results["Bonus Points"].fillna(0)
+                        results = simulation
                         results["Simulated Total Points"] = results["Base Points"] + results["Bonus Points"]
 
-                        results = results.sort_values("Base Points", ascending=False).reset_index(drop=True)
-                        results["Original Rank"] = results.index + 1
-
-                        results = results.sort_values("Simulated Total Points", ascending=False).reset_index(drop=True)
-                        results["New Rank"] = results.index + 1
+                        results["Original Rank"] = (
+                            results["Base Points"].rank(method="first", ascending=False).astype("int32")
+                        )
+                        results["New Rank"] = (
+                            results["Simulated Total Points"].rank(method="first", ascending=False).astype("int32")
+                        )
 
                         results["Rank Change"] = results["Original Rank"] - results["New Rank"]
 
-                        def rank_arrow(x):
-                            if x > 0:
-                                return "⬆️"
-                            elif x < 0:
-                                return "⬇️"
-                            else:
-                                return "➖"
-
-                        results["Movement"] = results["Rank Change"].apply(rank_arrow)
+                        rank_change = results["Rank Change"].to_numpy()
+                        results["Movement"] = np.select(
+                            [rank_change > 0, rank_change < 0],
+                            ["⬆️", "⬇️"],
+                            default="➖"
+                        )
 
                         st.subheader("📈 Simulated Franchise Ranking Changes")
                         st.dataframe(
-                            results[[
+                            results.sort_values("New Rank")[[
                                 "Team",
                                 "Original Rank",
                                 "New Rank",
@@ -584,6 +599,18 @@ with tab2:
                             hide_index=True
                         )
 
+# ========================
+# Tab separation
+# ========================
+tab1, tab2, tab3 = st.tabs(["📊 Rankings", "🏆 Playoff Simulator", "Algorithm & Scoring"])
+
+# Widget changes inside a fragment rerun only that tab, not the whole script
+with tab1:
+    rankings_tab()
+
+with tab2:
+    sim_tab()
+
 # ========================
 # TAB 3 — Algorithm & Scoring
 # ========================
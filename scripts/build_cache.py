@@ -0,0 +1,92 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+
+# ========================
+# Paths
+# ========================
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+WORKBOOK = DATA_DIR / "nfl_data.xlsm"
+CACHE_DIR = DATA_DIR / ".cache"
+
+CACHE_FILES = {
+    "master": CACHE_DIR / "master.parquet",
+    "ranks": CACHE_DIR / "ranks.parquet",
+    "winrank": CACHE_DIR / "winrank.parquet",
+    "winpct": CACHE_DIR / "winpct.parquet",
+}
+
+
+# Per-season achievement counts; the workbook leaves these blank instead of 0.
+# Regular Season Wins/Losses/Ties stay float: a blank there is a season not played.
+ACHIEVEMENT_COLS = [
+    "Playoff Appearance?", "Division Title?", "2nd Round app", "CC app",
+    "SB App", "SB Win", "MVP", "OPOY", "DPOY", "OROY", "DROY", "COY", "CPOY",
+]
+# Integer columns with no blanks
+INT_COLS = ["Cumulative Stats", "Reg Season Winning % Rank", "Reg Season Points"]
+
+
+def melt_year_team(df, value_name):
+    year_col = df.columns[0]
+    return (
+        df.melt(
+            id_vars=[year_col],
+            var_name="Team",
+            value_name=value_name
+        )
+        .rename(columns={year_col: "Year"})
+        .dropna(subset=[value_name])
+    )
+
+
+# Rebuild when any Parquet file is missing or older than the workbook / this script
+def cache_is_stale():
+    source_mtime = max(os.path.getmtime(WORKBOOK), os.path.getmtime(__file__))
+    return any(
+        not path.exists() or os.path.getmtime(path) < source_mtime
+        for path in CACHE_FILES.values()
+    )
+
+
+def build_cache():
+    sheets = pd.read_excel(
+        WORKBOOK,
+        sheet_name=[
+            "Master Sheet",
+            "Rank by Year",
+            "Winning % Rank Over Time",
+            "Winning % Over Time"
+        ],
+        engine="calamine"
+    )
+
+    frames = {
+        "master": sheets["Master Sheet"],
+        "ranks": melt_year_team(sheets["Rank by Year"], "Rank"),
+        "winrank": melt_year_team(sheets["Winning % Rank Over Time"], "Winning % Rank"),
+        "winpct": melt_year_team(sheets["Winning % Over Time"], "Winning %"),
+    }
+
+    # Team and Division repeat on every row, so store them dictionary-encoded;
+    # Year spans 1966 to present, so int16 is plenty
+    for df in frames.values():
+        df["Team"] = df["Team"].astype("category")
+        df["Year"] = pd.to_numeric(df["Year"], downcast="integer")
+    frames["master"]["Division"] = frames["master"]["Division"].astype("category")
+
+    # Ranks and counts are small integers, so narrow them from float64/int64
+    master = frames["master"]
+    master[ACHIEVEMENT_COLS] = master[ACHIEVEMENT_COLS].fillna(0).astype("int16")
+    master[INT_COLS] = master[INT_COLS].astype("int16")
+    frames["ranks"]["Rank"] = frames["ranks"]["Rank"].astype("int16")
+    frames["winrank"]["Winning % Rank"] = frames["winrank"]["Winning % Rank"].astype("int16")
+
+    CACHE_DIR.mkdir(exist_ok=True)
+    for name, df in frames.items():
+        df.to_parquet(CACHE_FILES[name], engine="pyarrow", index=False)
+
+
+if __name__ == "__main__":
+    build_cache()